@@ -1,11 +1,83 @@
+import functools
 import numpy as np
 import gym
 from gym import spaces, logger
-from gym.utils import seeding
 from or_gym.utils import assign_env_config
-import copy
 import jax
 
+def _knapsack_step(item, item_weights, item_values, current_weight,
+    max_weight, over_packed_penalty):
+    # Returns the new weight, reward and done flag for placing item
+    new_weight = current_weight + item_weights[item]
+    # Done if the item does not fit or fills the knapsack exactly
+    done = new_weight >= max_weight
+    if new_weight <= max_weight:
+        return new_weight, item_values[item], done
+    # End trial if over weight
+    return current_weight, over_packed_penalty, done
+
+def _knapsack_random_rollouts_py(item_weights, item_values, max_weight,
+    over_packed_penalty, n_episodes, seed):
+    # Plays n_episodes with a uniform random policy and returns the total
+    # reward of each episode, drawing from its own Generator so the global
+    # NumPy random state is left untouched
+    rng = np.random.default_rng(seed)
+    N = item_weights.shape[0]
+    returns = np.zeros(n_episodes)
+    for ep in range(n_episodes):
+        current_weight = 0
+        done = False
+        while not done:
+            item = rng.integers(N)
+            current_weight, reward, done = _knapsack_step(item, item_weights,
+                item_values, current_weight, max_weight, over_packed_penalty)
+            returns[ep] += reward
+    return returns
+
+@functools.lru_cache(maxsize=None)
+def _knapsack_random_rollouts():
+    # Numba is optional and only imported on the first rollout. Returns the
+    # compiled rollout loop, or the plain Python one without Numba.
+    try:
+        from numba import njit
+    except ImportError:
+        return _knapsack_random_rollouts_py
+    knapsack_step = njit(cache=True)(_knapsack_step)
+
+    @njit(cache=True)
+    def random_rollouts(item_weights, item_values, max_weight,
+        over_packed_penalty, n_episodes, seed):
+        # Seeding here affects Numba's own generator rather than NumPy's
+        # global one
+        np.random.seed(seed)
+        N = item_weights.shape[0]
+        returns = np.zeros(n_episodes)
+        for ep in range(n_episodes):
+            current_weight = 0
+            done = False
+            while not done:
+                item = np.random.randint(0, N)
+                current_weight, reward, done = knapsack_step(item, item_weights,
+                    item_values, current_weight, max_weight, over_packed_penalty)
+                returns[ep] += reward
+        return returns
+
+    return random_rollouts
+
+def _copy_obs(obs):
+    # Copies an observation so it does not alias the env's state buffers
+    if isinstance(obs, dict):
+        return {key: _copy_obs(value) for key, value in obs.items()}
+    if hasattr(obs, "clone"):
+        # PyTorch tensors from GPUVectorKnapsackEnv
+        return obs.clone()
+    return obs.copy()
+
+def _seed_given(kwargs):
+    # True if the seed was passed directly or through env_config rather
+    # than left at its default
+    return 'seed' in kwargs or 'seed' in kwargs.get('env_config', {})
+
 class KnapsackEnv(gym.Env):
     '''
     Unbounded Knapsack Problem
@@ -27,6 +99,10 @@ class KnapsackEnv(gym.Env):
         2: maximum weight of the knapsack
         3: current weight in knapsack
 
+        Each observation is a copy unless reuse_obs_buffers is set, in
+        which case step and reset return the env's own state buffers and
+        these are overwritten by the next call.
+
     Actions:
         Type: Discrete
         0: Place item 0 into knapsack
@@ -46,25 +122,69 @@ class KnapsackEnv(gym.Env):
     
     # Internal list of placed items for better rendering
     _collected_items = []
+    # Read-only item data shared by all envs generated with the same N and
+    # seed, see _shared_items
+    _ITEMS_CACHE = {}
     
     def __init__(self, *args, **kwargs):
-        # Generate data with consistent random seed to ensure reproducibility
         self.N = 200
         self.max_weight = 200
         self.current_weight = 0
         self._max_reward = 10000
         self.mask = True
         self.seed = 0
-        self.item_numbers = np.arange(self.N)
-        self.item_weights = np.random.randint(1, 100, size=self.N)
-        self.item_values = np.random.randint(0, 100, size=self.N)
+        # Item data is generated from the seed after env_config is applied,
+        # unless it is provided there
+        self.item_weights = np.array([], dtype=np.int32)
+        self.item_values = np.array([], dtype=np.int32)
         self.over_packed_penalty = 0
         self.randomize_params_on_reset = False
+        self.reuse_obs_buffers = False
         self._collected_items.clear()
         # Add env_config, if any
         assign_env_config(self, kwargs)
-        self.set_seed()
+        # Items are generated from self.seed to ensure reproducibility, but
+        # episodes are only seeded with it when it is given explicitly
+        self.set_seed(self.seed if _seed_given(kwargs) else None)
+        self._generate_items()
+        self.item_numbers = np.arange(self.N)
 
+        self._init_spaces()
+        self._init_state_buf()
+        self.reset()
+
+    @classmethod
+    def _shared_items(cls, N, seed):
+        # Returns item weights, values and limits for N items. Generated once
+        # per (N, seed) from their own generator, so the env's np_random is
+        # in the same state whether or not the cache was hit. Without a seed
+        # the items are drawn from fresh entropy and not shared.
+        key = (N, seed)
+        if seed is None or key not in cls._ITEMS_CACHE:
+            rng = np.random.default_rng(seed)
+            items = (
+                rng.integers(1, 100, size=N, dtype=np.int32),
+                rng.integers(0, 100, size=N, dtype=np.int32),
+                rng.integers(1, 10, size=N, dtype=np.int32)
+            )
+            for arr in items:
+                arr.setflags(write=False)
+            if seed is None:
+                return items
+            cls._ITEMS_CACHE[key] = items
+        return cls._ITEMS_CACHE[key]
+
+    def _generate_items(self):
+        weights, values, _ = self._shared_items(self.N, self.seed)
+        if len(self.item_weights) == 0:
+            self.item_weights = weights
+        if len(self.item_values) == 0:
+            self.item_values = values
+        # Items given in env_config may be lists or another dtype
+        self.item_weights = np.asarray(self.item_weights, dtype=np.int32)
+        self.item_values = np.asarray(self.item_values, dtype=np.int32)
+
+    def _init_spaces(self):
         obs_space = spaces.Box(
             0, self.max_weight, shape=(2*self.N + 1,), dtype=np.int32)
         self.action_space = spaces.Discrete(self.N)
@@ -78,22 +198,18 @@ class KnapsackEnv(gym.Env):
             self.observation_space = spaces.Box(
                 0, self.max_weight, shape=(2, self.N + 1), dtype=np.int32)
         
-        self.reset()
-        
     def _STEP(self, item):
         # Check that item will fit
-        if self.item_weights[item] + self.current_weight <= self.max_weight:
-            self.current_weight += self.item_weights[item]
-            reward = self.item_values[item]
+        new_weight = self.current_weight + self._w_list[item]
+        if new_weight <= self.max_weight:
+            self.current_weight = new_weight
+            reward = self._v_list[item]
             self._collected_items.append(item)
-            if self.current_weight == self.max_weight:
-                done = True
-            else:
-                done = False
         else:
             # End trial if over weight
             reward = self.over_packed_penalty
-            done = True
+        # Done if the item did not fit or filled the knapsack exactly
+        done = new_weight >= self.max_weight
             
         self._update_state()
         return self.state, reward, done, {}
@@ -101,53 +217,68 @@ class KnapsackEnv(gym.Env):
     def _get_obs(self):
         return self.state
     
-    def _update_state(self):
+    def _init_state_buf(self):
+        # Item weights and values are fixed during an episode, so write them
+        # into the state buffer once and only update the current weight
+        # on each step. Plain lists of them are kept for scalar lookups in
+        # step, which are cheaper than indexing the arrays.
+        self._w_list = self.item_weights.tolist()
+        self._v_list = self.item_values.tolist()
         if self.mask:
-            mask = np.where(self.current_weight + self.item_weights > self.max_weight, 0, 1).astype(np.uint8)
-            state = np.hstack([
-                self.item_weights,
-                self.item_values,
-                np.array([self.current_weight])
-                ], dtype=np.int32)
-            self.state = {
-                "action_mask": mask,
-                "avail_actions": np.ones(self.N, dtype=np.uint8),
-                "state": state
+            self._mask_buf = np.empty(self.N, dtype=np.uint8)
+            self._avail_actions = np.ones(self.N, dtype=np.uint8)
+            self._state_buf = np.empty(2*self.N + 1, dtype=np.int32)
+            self._state_buf[:self.N] = self.item_weights
+            self._state_buf[self.N:2*self.N] = self.item_values
+            self._obs = {
+                "action_mask": self._mask_buf,
+                "avail_actions": self._avail_actions,
+                "state": self._state_buf
                 }
         else:
-            state = np.vstack([
-                self.item_weights,
-                self.item_values], dtype=np.int32)
-            self.state = np.hstack([
-                state,
-                np.array([
-                    [self.max_weight],
-                     [self.current_weight]])
-                ])        
+            self._state_buf = np.empty((2, self.N + 1), dtype=np.int32)
+            self._state_buf[0, :self.N] = self.item_weights
+            self._state_buf[1, :self.N] = self.item_values
+            self._state_buf[0, self.N] = self.max_weight
+            self._obs = self._state_buf
+
+    def _update_state(self):
+        if self.mask:
+            np.less_equal(self.item_weights, self.max_weight - self.current_weight,
+                out=self._mask_buf, casting='unsafe')
+            self._state_buf[-1] = self.current_weight
+        else:
+            self._state_buf[1, self.N] = self.current_weight
+        self.state = self._obs
     
     def _RESET(self):
         if self.randomize_params_on_reset:
-            self.item_weights = np.random.randint(1, 100, size=self.N)
-            self.item_values = np.random.randint(0, 100, size=self.N)
+            self.item_weights = self.np_random.integers(1, 100, size=self.N, dtype=np.int32)
+            self.item_values = self.np_random.integers(0, 100, size=self.N, dtype=np.int32)
+            self._init_state_buf()
         self.current_weight = 0
         self._collected_items.clear()
         self._update_state()
         return self.state
     
     def sample_action(self):
-        return np.random.choice(self.item_numbers)
+        return int(self.np_random.integers(self.N))
 
     def set_seed(self, seed=None):
         if seed == None:
-            seed = np.random.randint(0, np.iinfo(np.int32).max)        
-        self.np_random, seed = seeding.np_random(seed)
+            seed = np.random.SeedSequence().entropy
+        self.np_random = np.random.default_rng(seed)
         return [seed]
 
+    def _return_obs(self, obs):
+        return obs if self.reuse_obs_buffers else _copy_obs(obs)
+
     def reset(self):
-        return self._RESET()
+        return self._return_obs(self._RESET())
 
     def step(self, action):
-        return self._STEP(action)
+        state, reward, done, info = self._STEP(action)
+        return self._return_obs(state), reward, done, info
         
     def render(self):
         total_value = 0
@@ -161,81 +292,54 @@ class KnapsackEnv(gym.Env):
         # RlLib requirement: Make sure you either return a uint8/w x h x 3 (RGB) image or handle rendering in a window and then return `True`.
         return True
     
+    def random_rollouts(self, n_episodes, seed=None):
+        # Total rewards of n_episodes under a uniform random policy, with the
+        # whole loop compiled when Numba is available. The compiled and plain
+        # Python loops draw from different generators, so a seed only
+        # reproduces results on the same backend.
+        if seed is None:
+            seed = self.np_random.integers(np.iinfo(np.int32).max)
+        return _knapsack_random_rollouts()(self.item_weights, self.item_values,
+            self.max_weight, self.over_packed_penalty, n_episodes, seed)
+
     def step_jax_rng(self, key, action):
         # Added for or-gymnax tests
         # No random element, so just call step
         return self.step(action)
 
-class BinaryKnapsackEnv(KnapsackEnv):
+class _LimitedKnapsackEnv(KnapsackEnv):
     '''
-    Binary Knapsack Problem
-
-    The Binary or 0-1 KP allows selection of each item only once or not at
-    all.
-
-    The episodes proceed by selecting items and placing them into the
-    knapsack one at a time until the weight limit is reached or exceeded, at
-    which point the episode ends.
-
-    Observation:
-        Type: Tuple, Discrete
-        0: list of item weights
-        1: list of item values
-        2: list of item limits
-        3: maximum weight of the knapsack
-        4: current weight in knapsack
-
-    Actions:
-        Type: Discrete
-        0: Place item 0 into knapsack
-        1: Place item 1 into knapsack
-        2: ...
-
-    Reward:
-        Value of item successfully placed into knapsack or 0 if the item
-        doesn't fit, at which point the episode ends.
-
-    Starting State:
-        Lists of available items and empty knapsack.
-
-    Episode Termination:
-        Full knapsack or selection that puts the knapsack over the limit.
+    Shared implementation of the knapsack problems where each item can only
+    be selected up to its limit in item_limits. Subclasses set the limits
+    for each episode in _reset_limits.
     '''
-    def __init__(self, *args, **kwargs):
-        super().__init__()
-        self.item_weights = np.random.randint(1, 100, size=self.N)
-        self.item_values = np.random.randint(0, 100, size=self.N)
-        assign_env_config(self, kwargs)
-
+    def _init_spaces(self):
         obs_space = spaces.Box(
             0, self.max_weight, shape=(3, self.N + 1), dtype=np.int32)
+        self.action_space = spaces.Discrete(self.N)
         if self.mask:
             self.observation_space = spaces.Dict({
-                "action_mask": spaces.Box(0, 1, shape=(len(self.item_limits),), dtype=np.uint8),
-                "avail_actions": spaces.Box(0, 1, shape=(len(self.item_limits),), dtype=np.uint8),
+                "action_mask": spaces.Box(0, 1, shape=(self.N,), dtype=np.uint8),
+                "avail_actions": spaces.Box(0, 1, shape=(self.N,), dtype=np.uint8),
                 "state": obs_space
             })
         else:
             self.observation_space = obs_space
-
-        self.reset()
-
+        
     def _STEP(self, item):
-        # Check item limit
-        if self.item_limits[item] > 0:
+        # Check item limit, items without stock are not in the available list
+        if self._pos[item] >= 0:
             # Check that item will fit
-            if self.item_weights[item] + self.current_weight <= self.max_weight:
-                self.current_weight += self.item_weights[item]
-                reward = self.item_values[item]
-                if self.current_weight == self.max_weight:
-                    done = True
-                else:
-                    done = False
+            new_weight = self.current_weight + self._w_list[item]
+            if new_weight <= self.max_weight:
+                self.current_weight = new_weight
+                reward = self._v_list[item]
                 self._update_state(item)
             else:
                 # End if over weight
                 reward = 0
-                done = True
+            # Done if the item did not fit or filled the knapsack exactly
+            done = new_weight >= self.max_weight
         else:
             # End if item is unavailable
             reward = 0
@@ -243,51 +347,126 @@ class BinaryKnapsackEnv(KnapsackEnv):
             
         return self.state, reward, done, {}
 
+    def _init_state_buf(self):
+        self._w_list = self.item_weights.tolist()
+        self._v_list = self.item_values.tolist()
+        self._state_buf = np.empty((3, self.N + 1), dtype=np.int32)
+        self._state_buf[0, :self.N] = self.item_weights
+        self._state_buf[1, :self.N] = self.item_values
+        self._state_buf[0, self.N] = self.max_weight
+        self._state_buf[2, self.N] = 0 # Serves as place holder
+        if self.mask:
+            self._mask_buf = np.empty(self.N, dtype=np.uint8)
+            self._avail_actions = np.ones(self.N, dtype=np.uint8)
+            self._obs = {
+                "action_mask": self._mask_buf,
+                "avail_actions": self._avail_actions,
+                "state": self._state_buf
+            }
+        else:
+            self._obs = self._state_buf
+
     def _update_state(self, item=None):
         if item is not None:
             self.item_limits[item] -= 1
-        state_items = np.vstack([
-            self.item_weights,
-            self.item_values,
-            self.item_limits
-        ], dtype=np.int32)
-        state = np.hstack([
-            state_items, 
-            np.array([[self.max_weight],
-                      [self.current_weight], 
-                      [0] # Serves as place holder
-                ])
-        ], dtype=np.int32)
+            self._state_buf[2, item] = self.item_limits[item]
+            if self.item_limits[item] == 0:
+                self._remove_avail(item)
+        self._state_buf[1, self.N] = self.current_weight
         if self.mask:
-            mask = np.where(self.current_weight + self.item_weights > self.max_weight, 0, 1).astype(np.uint8)
-            mask = np.where(self.item_limits > 0, mask, 0)
-            self.state = {
-                "action_mask": mask,
-                "avail_actions": np.ones(self.N, dtype=np.uint8),
-                "state": state
-            }
-        else:
-            self.state = state.copy()
+            # Item must fit and still be available
+            np.less_equal(self.item_weights, self.max_weight - self.current_weight,
+                out=self._mask_buf, casting='unsafe')
+            np.logical_and(self._mask_buf, self.item_limits,
+                out=self._mask_buf, casting='unsafe')
+        self.state = self._obs
         
+    def _reset_avail(self):
+        # Items with remaining stock and each item's position in that list,
+        # kept up to date by swap-removal as items run out
+        self._avail = np.flatnonzero(self.item_limits).tolist()
+        self._pos = [-1] * self.N
+        for idx, item in enumerate(self._avail):
+            self._pos[item] = idx
+
+    def _remove_avail(self, item):
+        idx = self._pos[item]
+        last = self._avail.pop()
+        if last != item:
+            self._avail[idx] = last
+            self._pos[last] = idx
+        self._pos[item] = -1
+
     def sample_action(self):
-        return np.random.choice(
-            self.item_numbers[np.where(self.item_limits!=0)])
+        return self._avail[self.np_random.integers(len(self._avail))]
     
+    def _reset_limits(self):
+        raise NotImplementedError
+
     def _RESET(self):
         if self.randomize_params_on_reset:
-            self.item_weights = np.random.randint(1, 100, size=self.N)
-            self.item_values = np.random.randint(0, 100, size=self.N)
+            self.item_weights = self.np_random.integers(1, 100, size=self.N, dtype=np.int32)
+            self.item_values = self.np_random.integers(0, 100, size=self.N, dtype=np.int32)
+            self._init_state_buf()
+        self._reset_limits()
+        self._state_buf[2, :self.N] = self.item_limits
+        self._reset_avail()
+
         self.current_weight = 0
-        self.item_limits = np.ones(self.N, dtype=np.int32)
         self._update_state()
         return self.state
-
+    
     def step_jax_rng(self, key, action):
         # Added for or-gymnax tests
         # No random element, so just call step
         return self.step(action)
 
-class BoundedKnapsackEnv(KnapsackEnv):
+class BinaryKnapsackEnv(_LimitedKnapsackEnv):
+    '''
+    Binary Knapsack Problem
+
+    The Binary or 0-1 KP allows selection of each item only once or not at
+    all.
+
+    The episodes proceed by selecting items and placing them into the
+    knapsack one at a time until the weight limit is reached or exceeded, at
+    which point the episode ends.
+
+    Observation:
+        Type: Tuple, Discrete
+        0: list of item weights
+        1: list of item values
+        2: list of item limits
+        3: maximum weight of the knapsack
+        4: current weight in knapsack
+
+        Copied unless reuse_obs_buffers is set, see KnapsackEnv.
+
+    Actions:
+        Type: Discrete
+        0: Place item 0 into knapsack
+        1: Place item 1 into knapsack
+        2: ...
+
+    Reward:
+        Value of item successfully placed into knapsack or 0 if the item
+        doesn't fit, at which point the episode ends.
+
+    Starting State:
+        Lists of available items and empty knapsack.
+
+    Episode Termination:
+        Full knapsack or selection that puts the knapsack over the limit.
+    '''
+    def _generate_items(self):
+        super()._generate_items()
+        # Each item can be selected once, reset refills this every episode
+        self.item_limits = np.ones(self.N, dtype=np.int32)
+
+    def _reset_limits(self):
+        self.item_limits.fill(1)
+
+class BoundedKnapsackEnv(_LimitedKnapsackEnv):
     '''
     Bounded Knapsack Problem
 
@@ -309,6 +488,8 @@ class BoundedKnapsackEnv(KnapsackEnv):
         3: maximum weight of the knapsack
         4: current weight in knapsack
 
+        Copied unless reuse_obs_buffers is set, see KnapsackEnv.
+
     Actions:
         Type: Discrete
         0: Place item 0 into knapsack
@@ -326,95 +507,22 @@ class BoundedKnapsackEnv(KnapsackEnv):
         Full knapsack or selection that puts the knapsack over the limit.
     '''
     def __init__(self, *args, **kwargs):
-        self.N = 200
-        self.item_limits_init = np.random.randint(1, 10, size=self.N, dtype=np.int32)
-        self.item_limits = self.item_limits_init.copy()
-        super().__init__()
-        self.item_weights = np.random.randint(1, 100, size=self.N, dtype=np.int32)
-        self.item_values = np.random.randint(0, 100, size=self.N, dtype=np.int32)
-
-        assign_env_config(self, kwargs)
-
-        obs_space = spaces.Box(
-            0, self.max_weight, shape=(3, self.N + 1), dtype=np.int32)
-        if self.mask:
-            self.observation_space = spaces.Dict({
-                "action_mask": spaces.Box(0, 1, shape=(len(self.item_limits),), dtype=np.uint8),
-                "avail_actions": spaces.Box(0, 1, shape=(len(self.item_limits),), dtype=np.uint8),
-                "state": obs_space
-            })
-        else:
-            self.observation_space = obs_space
-        
-    def _STEP(self, item):
-        # Check item limit
-        if self.item_limits[item] > 0:
-            # Check that item will fit
-            if self.item_weights[item] + self.current_weight <= self.max_weight:
-                self.current_weight += self.item_weights[item]
-                reward = self.item_values[item]
-                if self.current_weight == self.max_weight:
-                    done = True
-                else:
-                    done = False
-                self._update_state(item)
-            else:
-                # End if over weight
-                reward = 0
-                done = True
-        else:
-            # End if item is unavailable
-            reward = 0
-            done = True
-            
-        return self.state, reward, done, {}
-
-    def _update_state(self, item=None):
-        if item is not None:
-            self.item_limits[item] -= 1
-        state_items = np.vstack([
-            self.item_weights,
-            self.item_values,
-            self.item_limits
-        ], dtype=np.int32)
-        state = np.hstack([
-            state_items, 
-            np.array([[self.max_weight],
-                      [self.current_weight], 
-                      [0] # Serves as place holder
-                ], dtype=np.int32)
-        ])
-        if self.mask:
-            mask = np.where(self.current_weight + self.item_weights > self.max_weight, 0, 1).astype(np.uint8)
-            mask = np.where(self.item_limits > 0, mask, 0)
-            self.state = {
-                "action_mask": mask,
-                "avail_actions": np.ones(self.N, dtype=np.uint8),
-                "state": state
-            }
-        else:
-            self.state = state.copy()
-        
-    def sample_action(self):
-        return np.random.choice(
-            self.item_numbers[np.where(self.item_limits!=0)])
-    
-    def _RESET(self):
+        self.item_limits_init = np.array([], dtype=np.int32)
+        super().__init__(*args, **kwargs)
+
+    def _generate_items(self):
+        super()._generate_items()
+        if len(self.item_limits_init) == 0:
+            self.item_limits_init = self._shared_items(self.N, self.seed)[2]
+        self.item_limits_init = np.asarray(self.item_limits_init, dtype=np.int32)
+        # Reset copies the initial limits into this array every episode
+        self.item_limits = np.empty_like(self.item_limits_init)
+
+    def _reset_limits(self):
         if self.randomize_params_on_reset:
-            self.item_weights = np.random.randint(1, 100, size=self.N, dtype=np.int32)
-            self.item_values = np.random.randint(0, 100, size=self.N, dtype=np.int32)
-            self.item_limits = np.random.randint(1, 10, size=self.N, dtype=np.int32)
+            self.item_limits = self.np_random.integers(1, 10, size=self.N, dtype=np.int32)
         else:
-            self.item_limits = self.item_limits_init.copy()
-
-        self.current_weight = 0
-        self._update_state()
-        return self.state
-    
-    def step_jax_rng(self, key, action):
-        # Added for or-gymnax tests
-        # No random element, so just call step
-        return self.step(action)
+            np.copyto(self.item_limits, self.item_limits_init)
 
 class OnlineKnapsackEnv(BoundedKnapsackEnv):
     '''
@@ -437,6 +545,7 @@ class OnlineKnapsackEnv(BoundedKnapsackEnv):
         3: maximum weight of the knapsack
         4: current weight in knapsack
 
+        Copied unless reuse_obs_buffers is set, see KnapsackEnv.
 
     Actions:
         Type: Discrete
@@ -455,10 +564,13 @@ class OnlineKnapsackEnv(BoundedKnapsackEnv):
         the number of items to be drawn has been reached.
     '''
     def __init__(self, *args, **kwargs):
-        BoundedKnapsackEnv.__init__(self)
-        assign_env_config(self, kwargs)
-        self.action_space = spaces.Discrete(2)
+        self.step_counter = 0
+        self.step_limit = 50
+        super().__init__(*args, **kwargs)
+        self._max_reward = 600
 
+    def _init_spaces(self):
+        self.action_space = spaces.Discrete(2)
         obs_space = spaces.Box(0, self.max_weight, shape=(4,), dtype=np.int32)
         if self.mask:
             self.observation_space = spaces.Dict({
@@ -468,72 +580,82 @@ class OnlineKnapsackEnv(BoundedKnapsackEnv):
             })
         else:
             self.observation_space = obs_space
-
-        self.step_counter = 0
-        self.step_limit = 50
-        
-        self.state = self.reset()
-        self._max_reward = 600
         
     def _STEP(self, action):
         if bool(action):
             # Check that item will fit
-            if self.item_weights[self.current_item] + self.current_weight <= self.max_weight:
-                self.current_weight += self.item_weights[self.current_item]
-                reward = self.item_values[self.current_item]
-                if self.current_weight == self.max_weight:
-                    done = True
-                else:
-                    done = False
+            new_weight = self.current_weight + self._w_list[self.current_item]
+            if new_weight <= self.max_weight:
+                self.current_weight = new_weight
+                reward = self._v_list[self.current_item]
             else:
                 # End if over weight
                 reward = 0
-                done = True
+            # Done if the item did not fit or filled the knapsack exactly
+            done = new_weight >= self.max_weight
         else:
             reward = 0
             done = False
         
-        self._update_state()
         self.step_counter += 1
+        self._update_state()
         if self.step_counter >= self.step_limit:
             done = True
             
         return self.state, reward, done, {}
     
-    def _update_state(self):
-        self.current_item = np.random.choice(self.item_numbers, p=self.item_probs)
-        current_item_weight = self.item_weights[self.current_item]
-        state = np.array([
-                self.current_weight,
-                self.current_item,
-                current_item_weight,
-                self.item_values[self.current_item]
-                ],)
+    def _init_state_buf(self):
+        self._w_list = self.item_weights.tolist()
+        self._v_list = self.item_values.tolist()
+        self._state_buf = np.empty(4, dtype=np.int32)
         if self.mask:
-            mask = np.ones(2, dtype=np.uint8)
-            if current_item_weight + self.current_weight > self.max_weight:
-                mask[1] = 0
-            self.state = {
-                'state': state,
-                'avail_actions': np.ones(2, dtype=np.uint8),
-                'action_mask': mask
-            }            
+            # Rejecting the item is always allowed
+            self._mask_buf = np.ones(2, dtype=np.uint8)
+            self._avail_actions = np.ones(2, dtype=np.uint8)
+            self._obs = {
+                'state': self._state_buf,
+                'avail_actions': self._avail_actions,
+                'action_mask': self._mask_buf
+            }
         else:
-            self.state = state
+            self._obs = self._state_buf
+
+    def _update_state(self):
+        # Stepping past the end of the stream drawn at reset keeps showing
+        # the last drawn item
+        self.current_item = self._item_stream[
+            min(self.step_counter, len(self._item_stream) - 1)]
+        current_item_weight = self._w_list[self.current_item]
+        self._state_buf[:] = (
+            self.current_weight,
+            self.current_item,
+            current_item_weight,
+            self._v_list[self.current_item]
+            )
+        if self.mask:
+            self._mask_buf[1] = current_item_weight + self.current_weight <= self.max_weight
+        self.state = self._obs
 
     def sample_action(self):
-        return np.random.choice([0, 1])
+        return int(self.np_random.integers(2))
     
     def _RESET(self):
         if self.randomize_params_on_reset:
-            self.item_weights = np.random.randint(1, 100, size=self.N, dtype=np.int32)
-            self.item_values = np.random.randint(0, 100, size=self.N, dtype=np.int32)
-            self.item_limits = np.random.randint(1, 10, size=self.N, dtype=np.int32)
+            self.item_weights = self.np_random.integers(1, 100, size=self.N, dtype=np.int32)
+            self.item_values = self.np_random.integers(0, 100, size=self.N, dtype=np.int32)
+            self.item_limits = self.np_random.integers(1, 10, size=self.N, dtype=np.int32)
+            self._init_state_buf()
         else:
-            self.item_limits = self.item_limits_init.copy()
+            np.copyto(self.item_limits, self.item_limits_init)
 
         if not hasattr(self, 'item_probs'):
             self.item_probs = self.item_limits_init / self.item_limits_init.sum()
+            self._item_cdf = np.cumsum(self.item_probs)
+            # Guard against round-off leaving the total just below 1
+            self._item_cdf[-1] = 1.0
+        # Draw every item shown this episode up front by inverting the CDF
+        self._item_stream = self._item_cdf.searchsorted(
+            self.np_random.random(self.step_limit + 1), side='right').tolist()
         self.current_weight = 0
         self.step_counter = 0
         self._update_state()
@@ -586,3 +708,264 @@ class OnlineKnapsackEnv(BoundedKnapsackEnv):
             }            
         else:
             self.state = state
+
+class VectorKnapsackEnv(gym.Env):
+    '''
+    Vectorized Unbounded Knapsack Problem
+
+    Runs num_envs copies of the unbounded knapsack problem side by side.
+    All copies share the same items and only differ in the current weight
+    of their knapsack, so each call to step advances every copy with a
+    handful of array operations rather than one Python call per copy.
+
+    Copies that finish an episode are reset automatically on the following
+    call to step: the action given for that copy is ignored, the reward is
+    0 and the returned observation is the empty knapsack. This matches the
+    NEXT_STEP autoreset mode of Gymnasium's vector environments.
+
+    Observation:
+        Type: Batched Tuple, Discrete
+        Same as KnapsackEnv with a leading axis of size num_envs, also
+        copied unless reuse_obs_buffers is set.
+
+    Actions:
+        Type: MultiDiscrete
+        Item to place into each of the num_envs knapsacks.
+
+    Reward:
+        Array of rewards, one per copy, as defined in KnapsackEnv.
+
+    Starting State:
+        Lists of available items and empty knapsacks.
+
+    Episode Termination:
+        Array of done flags, one per copy, as defined in KnapsackEnv.
+    '''
+    def __init__(self, *args, **kwargs):
+        self.num_envs = 64
+        self.N = 200
+        self.max_weight = 200
+        self._max_reward = 10000
+        self.mask = True
+        self.seed = 0
+        # Item data is generated from the seed after env_config is applied,
+        # unless it is provided there
+        self.item_weights = np.array([], dtype=np.int32)
+        self.item_values = np.array([], dtype=np.int32)
+        self.over_packed_penalty = 0
+        self.reuse_obs_buffers = False
+        # Add env_config, if any
+        assign_env_config(self, kwargs)
+        self.set_seed(self.seed if _seed_given(kwargs) else None)
+        # Same items as a KnapsackEnv with this N and seed
+        weights, values, _ = KnapsackEnv._shared_items(self.N, self.seed)
+        if len(self.item_weights) == 0:
+            self.item_weights = weights
+        if len(self.item_values) == 0:
+            self.item_values = values
+        self.item_weights = np.asarray(self.item_weights, dtype=np.int32)
+        self.item_values = np.asarray(self.item_values, dtype=np.int32)
+
+        self.current_weight = np.zeros(self.num_envs, dtype=np.int32)
+        # Copies to reset at the start of the next step
+        self._autoreset = np.zeros(self.num_envs, dtype=bool)
+
+        self.action_space = spaces.MultiDiscrete([self.N] * self.num_envs)
+        if self.mask:
+            self.observation_space = spaces.Dict({
+                "action_mask": spaces.Box(0, 1, shape=(self.num_envs, self.N), dtype=np.uint8),
+                "avail_actions": spaces.Box(0, 1, shape=(self.num_envs, self.N), dtype=np.uint8),
+                "state": spaces.Box(0, self.max_weight,
+                    shape=(self.num_envs, 2*self.N + 1), dtype=np.int32)
+                })
+        else:
+            self.observation_space = spaces.Box(
+                0, self.max_weight, shape=(self.num_envs, 2, self.N + 1), dtype=np.int32)
+
+        self._init_state_buf()
+        self.reset()
+
+    def _init_state_buf(self):
+        # Item rows are shared by all copies and written once; only the
+        # current weight column changes on each step.
+        if self.mask:
+            self._mask_buf = np.empty((self.num_envs, self.N), dtype=np.uint8)
+            self._avail_actions = np.ones((self.num_envs, self.N), dtype=np.uint8)
+            self._state_buf = np.empty((self.num_envs, 2*self.N + 1), dtype=np.int32)
+            self._state_buf[:, :self.N] = self.item_weights
+            self._state_buf[:, self.N:2*self.N] = self.item_values
+            self._obs = {
+                "action_mask": self._mask_buf,
+                "avail_actions": self._avail_actions,
+                "state": self._state_buf
+                }
+        else:
+            self._state_buf = np.empty((self.num_envs, 2, self.N + 1), dtype=np.int32)
+            self._state_buf[:, 0, :self.N] = self.item_weights
+            self._state_buf[:, 1, :self.N] = self.item_values
+            self._state_buf[:, 0, self.N] = self.max_weight
+            self._obs = self._state_buf
+
+    def _STEP(self, actions):
+        actions = np.asarray(actions)
+        new_weight = self.current_weight + self.item_weights[actions]
+        fits = new_weight <= self.max_weight
+        np.copyto(self.current_weight, new_weight, where=fits)
+        rewards = np.where(fits, self.item_values[actions], self.over_packed_penalty)
+        # Done if the item did not fit or filled the knapsack exactly
+        dones = new_weight >= self.max_weight
+
+        # Reset copies that finished on the previous step
+        if self._autoreset.any():
+            self.current_weight[self._autoreset] = 0
+            rewards[self._autoreset] = 0
+            dones[self._autoreset] = False
+        # Copy so the caller can modify the returned flags
+        self._autoreset = dones.copy()
+
+        self._update_state()
+        return self.state, rewards, dones, {}
+
+    def _update_state(self):
+        if self.mask:
+            np.less_equal(self.item_weights, (self.max_weight - self.current_weight)[:, None],
+                out=self._mask_buf, casting='unsafe')
+            self._state_buf[:, -1] = self.current_weight
+        else:
+            self._state_buf[:, 1, self.N] = self.current_weight
+        self.state = self._obs
+
+    def _RESET(self):
+        self.current_weight[:] = 0
+        self._autoreset[:] = False
+        self._update_state()
+        return self.state
+
+    def sample_action(self):
+        return self.np_random.integers(self.N, size=self.num_envs)
+
+    def set_seed(self, seed=None):
+        if seed == None:
+            seed = np.random.SeedSequence().entropy
+        self.np_random = np.random.default_rng(seed)
+        return [seed]
+
+    def _return_obs(self, obs):
+        return obs if self.reuse_obs_buffers else _copy_obs(obs)
+
+    def reset(self):
+        return self._return_obs(self._RESET())
+
+    def step(self, actions):
+        state, rewards, dones, info = self._STEP(actions)
+        return self._return_obs(state), rewards, dones, info
+
+class GPUVectorKnapsackEnv(VectorKnapsackEnv):
+    '''
+    GPU Vectorized Unbounded Knapsack Problem
+
+    Same problem and autoreset behavior as VectorKnapsackEnv, but the
+    batch is held in PyTorch tensors on a CUDA device so thousands of
+    copies are stepped with a few kernel launches. Falls back to the CPU
+    when CUDA is not available. Requires PyTorch.
+
+    Observation:
+        Type: Batched Tuple, Discrete
+        Same as VectorKnapsackEnv, as tensors on the env's device.
+
+    Actions:
+        Type: MultiDiscrete
+        Tensor or array with the item to place into each knapsack.
+
+    Reward:
+        Tensor of rewards, one per copy.
+
+    Starting State:
+        Lists of available items and empty knapsacks.
+
+    Episode Termination:
+        Tensor of done flags, one per copy.
+    '''
+    def __init__(self, *args, **kwargs):
+        # Set defaults here as the parent sets num_envs before the config
+        # is applied
+        self.device_id = 0
+        kwargs.setdefault('num_envs', 4096)
+        super().__init__(*args, **kwargs)
+
+    def _init_state_buf(self):
+        # PyTorch is optional and only imported when this env is used
+        try:
+            import torch
+        except ImportError:
+            raise ImportError("GPUVectorKnapsackEnv requires PyTorch.")
+        self._torch = torch
+        if torch.cuda.is_available() and self.device_id >= 0:
+            self.device = torch.device(f"cuda:{self.device_id}")
+        else:
+            self.device = torch.device("cpu")
+        # Action sampling on the device is seeded from the env's generator
+        self._generator = torch.Generator(device=self.device)
+        self._generator.manual_seed(int(self.np_random.integers(np.iinfo(np.int64).max)))
+        # Move the items and the per-copy state onto the device
+        self.item_weights = torch.tensor(self.item_weights, dtype=torch.int32, device=self.device)
+        self.item_values = torch.tensor(self.item_values, dtype=torch.int32, device=self.device)
+        self.current_weight = torch.zeros(self.num_envs, dtype=torch.int32, device=self.device)
+        self._autoreset = torch.zeros(self.num_envs, dtype=torch.bool, device=self.device)
+        if self.mask:
+            self._mask_buf = torch.empty((self.num_envs, self.N), dtype=torch.uint8, device=self.device)
+            self._avail_actions = torch.ones((self.num_envs, self.N), dtype=torch.uint8, device=self.device)
+            self._state_buf = torch.empty((self.num_envs, 2*self.N + 1), dtype=torch.int32, device=self.device)
+            self._state_buf[:, :self.N] = self.item_weights
+            self._state_buf[:, self.N:2*self.N] = self.item_values
+            self._obs = {
+                "action_mask": self._mask_buf,
+                "avail_actions": self._avail_actions,
+                "state": self._state_buf
+                }
+        else:
+            self._state_buf = torch.empty((self.num_envs, 2, self.N + 1), dtype=torch.int32, device=self.device)
+            self._state_buf[:, 0, :self.N] = self.item_weights
+            self._state_buf[:, 1, :self.N] = self.item_values
+            self._state_buf[:, 0, self.N] = self.max_weight
+            self._obs = self._state_buf
+
+    def _STEP(self, actions):
+        torch = self._torch
+        actions = torch.as_tensor(actions, device=self.device)
+        new_weight = self.current_weight + self.item_weights[actions]
+        fits = new_weight <= self.max_weight
+        self.current_weight = torch.where(fits, new_weight, self.current_weight)
+        rewards = torch.where(fits, self.item_values[actions],
+            torch.full_like(new_weight, self.over_packed_penalty))
+        # Done if the item did not fit or filled the knapsack exactly
+        dones = new_weight >= self.max_weight
+
+        # Reset copies that finished on the previous step without syncing
+        # with the device to check whether there are any
+        self.current_weight.masked_fill_(self._autoreset, 0)
+        rewards.masked_fill_(self._autoreset, 0)
+        dones &= ~self._autoreset
+        self._autoreset = dones.clone()
+
+        self._update_state()
+        return self.state, rewards, dones, {}
+
+    def _update_state(self):
+        if self.mask:
+            self._mask_buf.copy_(
+                self.item_weights <= (self.max_weight - self.current_weight)[:, None])
+            self._state_buf[:, -1] = self.current_weight
+        else:
+            self._state_buf[:, 1, self.N] = self.current_weight
+        self.state = self._obs
+
+    def _RESET(self):
+        self.current_weight.zero_()
+        self._autoreset.zero_()
+        self._update_state()
+        return self.state
+
+    def sample_action(self):
+        return self._torch.randint(self.N, (self.num_envs,), device=self.device,
+            generator=self._generator)
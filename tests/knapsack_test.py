@@ -0,0 +1,186 @@
+#!usr/bin/env python
+
+'''
+Tests to ensure the faster knapsack environments match the
+reference environments and stay within their observation spaces.
+'''
+
+import numpy as np
+import pytest
+from or_gym.envs.classic_or.knapsack import (KnapsackEnv, VectorKnapsackEnv,
+    GPUVectorKnapsackEnv, BinaryKnapsackEnv, BoundedKnapsackEnv,
+    OnlineKnapsackEnv, _knapsack_random_rollouts_py)
+
+class TestKnapsackEnv:
+
+    def test_obs_buffers(self):
+        for env_class in [KnapsackEnv, BoundedKnapsackEnv, OnlineKnapsackEnv]:
+            env = env_class()
+            state = env.reset()
+            next_state, _, _, _ = env.step(0)
+            assert state["state"] is not next_state["state"]
+            env = env_class(env_config={'reuse_obs_buffers': True})
+            state = env.reset()
+            next_state, _, _, _ = env.step(0)
+            assert state["state"] is next_state["state"]
+
+    def test_items_from_lists(self):
+        items = dict(N=3, item_weights=[10, 20, 30], item_values=[1, 2, 3])
+        for env_class in [KnapsackEnv, BoundedKnapsackEnv, OnlineKnapsackEnv]:
+            env = env_class(**items, item_limits_init=[1, 2, 3])
+            state = env.reset()
+            assert env.observation_space.contains(state)
+            state, _, _, _ = env.step(1)
+            assert env.observation_space.contains(state)
+        vec_env = VectorKnapsackEnv(num_envs=4, **items)
+        _, rewards, _, _ = vec_env.step(np.array([0, 1, 2, 0]))
+        assert rewards.tolist() == [1, 2, 3, 1]
+
+    def test_shared_items(self):
+        env = KnapsackEnv(seed=5)
+        assert env.item_weights is KnapsackEnv(seed=5).item_weights
+        assert not env.item_weights.flags.writeable
+        # Without a seed every env draws its own items
+        env = KnapsackEnv(seed=None)
+        other = KnapsackEnv(seed=None)
+        assert (env.item_weights != other.item_weights).any()
+
+class TestVectorKnapsackEnv:
+
+    def _build_envs(self, num_envs, mask):
+        vec_env = VectorKnapsackEnv(num_envs=num_envs, mask=mask)
+        # Both generate the same items from the default seed
+        envs = [KnapsackEnv(mask=mask) for _ in range(num_envs)]
+        return vec_env, envs
+
+    def test_step_matches_single_env(self):
+        num_envs = 8
+        for mask in [True, False]:
+            vec_env, envs = self._build_envs(num_envs, mask)
+            vec_state = vec_env.reset()
+            assert vec_env.observation_space.contains(vec_state)
+            autoreset = np.zeros(num_envs, dtype=bool)
+            for _ in range(100):
+                actions = vec_env.sample_action()
+                vec_state, rewards, dones, _ = vec_env.step(actions)
+                assert vec_env.observation_space.contains(vec_state)
+                for i, env in enumerate(envs):
+                    if autoreset[i]:
+                        state = env.reset()
+                        reward, done = 0, False
+                    else:
+                        state, reward, done, _ = env.step(actions[i])
+                    assert rewards[i] == reward
+                    assert dones[i] == done
+                    if mask:
+                        assert (vec_state["state"][i] == state["state"]).all()
+                        assert (vec_state["action_mask"][i] == state["action_mask"]).all()
+                    else:
+                        assert (vec_state[i] == state).all()
+                autoreset = dones.copy()
+
+class TestGPUVectorKnapsackEnv:
+
+    def test_step_matches_vector_env(self):
+        pytest.importorskip("torch")
+        num_envs = 64
+        for mask in [True, False]:
+            gpu_env = GPUVectorKnapsackEnv(num_envs=num_envs, mask=mask)
+            vec_env = VectorKnapsackEnv(num_envs=num_envs, mask=mask)
+            vec_env.item_weights = gpu_env.item_weights.cpu().numpy()
+            vec_env.item_values = gpu_env.item_values.cpu().numpy()
+            vec_env._init_state_buf()
+            vec_env.reset()
+            for _ in range(100):
+                actions = gpu_env.sample_action()
+                gpu_state, gpu_rewards, gpu_dones, _ = gpu_env.step(actions)
+                vec_state, vec_rewards, vec_dones, _ = vec_env.step(actions.cpu().numpy())
+                assert (gpu_rewards.cpu().numpy() == vec_rewards).all()
+                assert (gpu_dones.cpu().numpy() == vec_dones).all()
+                if mask:
+                    assert (gpu_state["state"].cpu().numpy() == vec_state["state"]).all()
+                    assert (gpu_state["action_mask"].cpu().numpy() == vec_state["action_mask"]).all()
+                else:
+                    assert (gpu_state.cpu().numpy() == vec_state).all()
+
+class TestLimitedKnapsackEnv:
+
+    def test_step_to_exhaustion(self):
+        # Weight limit large enough to place every item up to its limit
+        for env_class in [BinaryKnapsackEnv, BoundedKnapsackEnv]:
+            env = env_class(N=20, max_weight=100000)
+            for _ in range(3):
+                env.reset()
+                while env._avail:
+                    action = env.sample_action()
+                    assert env.item_limits[action] > 0
+                    _, _, done, _ = env.step(action)
+                    assert not done
+                    assert sorted(env._avail) == np.flatnonzero(env.item_limits).tolist()
+                assert (env.item_limits == 0).all()
+                # Selecting an exhausted item ends the episode
+                _, reward, done, _ = env.step(0)
+                assert reward == 0 and done
+
+class TestOnlineKnapsackEnv:
+
+    def test_step_past_step_limit(self):
+        env = OnlineKnapsackEnv()
+        for _ in range(env.step_limit + 10):
+            state, reward, done, _ = env.step(0)
+        assert done
+        assert env.observation_space.contains(state)
+        # Raising the limit mid-episode keeps stepping past the drawn stream
+        env.reset()
+        env.step_limit += 10
+        for _ in range(env.step_limit):
+            state, _, _, _ = env.step(0)
+        assert env.observation_space.contains(state)
+
+    def test_seeded_item_stream(self):
+        env = OnlineKnapsackEnv(seed=3)
+        other = OnlineKnapsackEnv(seed=3)
+        for _ in range(5):
+            env.reset()
+            other.reset()
+            assert env._item_stream == other._item_stream
+            assert len(env._item_stream) == env.step_limit + 1
+            assert all(0 <= item < env.N for item in env._item_stream)
+
+    def test_default_envs_draw_different_streams(self):
+        env = OnlineKnapsackEnv()
+        other = OnlineKnapsackEnv()
+        assert (env.item_weights == other.item_weights).all()
+        assert env._item_stream != other._item_stream
+
+    def test_state_in_observation_space(self):
+        for mask in [True, False]:
+            for randomize in [True, False]:
+                env = OnlineKnapsackEnv(mask=mask,
+                    randomize_params_on_reset=randomize)
+                for _ in range(10):
+                    state = env.reset()
+                    assert env.observation_space.contains(state)
+                    done = False
+                    while not done:
+                        state, _, done, _ = env.step(env.sample_action())
+                        assert env.observation_space.contains(state)
+
+class TestKnapsackRollouts:
+
+    def test_random_rollouts(self):
+        env = KnapsackEnv(mask=False)
+        returns = env.random_rollouts(100, seed=0)
+        assert returns.shape == (100,)
+        assert (returns >= 0).all()
+        assert (returns == env.random_rollouts(100, seed=0)).all()
+
+    def test_fallback_rollouts_keep_global_state(self):
+        env = KnapsackEnv(mask=False)
+        np.random.seed(1)
+        expected = np.random.random()
+        np.random.seed(1)
+        returns = _knapsack_random_rollouts_py(env.item_weights, env.item_values,
+            env.max_weight, env.over_packed_penalty, 10, 0)
+        assert (returns >= 0).all()
+        assert np.random.random() == expected